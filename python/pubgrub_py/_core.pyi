@@ -14,8 +14,14 @@ class Resolver:
         {"foo": "1.0.0", "bar": "2.0.0"}
     """
 
-    def __init__(self) -> None:
-        """Create a new resolver instance."""
+    def __init__(self, capacity_hint: int | None = None) -> None:
+        """Create a new resolver instance.
+
+        Args:
+            capacity_hint: Expected number of (package, version) pairs.
+                Preallocates internal tables to avoid rehashing while a
+                large index is ingested.
+        """
         ...
 
     def add_package(
@@ -36,6 +42,24 @@ class Resolver:
         """
         ...
 
+    def add_packages(
+        self,
+        available: dict[str, dict[str, dict[str, str]]],
+    ) -> None:
+        """Add many packages with their versions and dependencies in one call.
+
+        Equivalent to calling :meth:`add_package` for every (package, version)
+        pair, but crosses the Python/Rust boundary only once.
+
+        Args:
+            available: Dict of {package: {version: {dep: constraint}}}.
+
+        Raises:
+            ValueError: If a version or constraint format is invalid. The
+                batch is validated up front, so a failure adds nothing.
+        """
+        ...
+
     def resolve(self, requirements: dict[str, str]) -> dict[str, str]:
         """Resolve dependencies starting from root packages.
 
@@ -28,8 +28,7 @@ def resolve(
         ... )
         {"app": "1.0.0", "lib": "2.1.0"}
     """
-    resolver = Resolver()
-    for pkg, versions in available.items():
-        for ver, deps in versions.items():
-            resolver.add_package(pkg, ver, deps)
+    n_versions = sum(len(versions) for versions in available.values())
+    resolver = Resolver(capacity_hint=n_versions)
+    resolver.add_packages(available)
     return resolver.resolve(requirements)
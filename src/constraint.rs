@@ -1,73 +1,136 @@
 //! PEP 440 version constraint parsing.
 
 use pubgrub::Ranges;
-use semver::Version;
 
 use crate::error::ResolverError;
+use crate::version::Version;
+
+/// Parse a plain `X.Y.Z` release version by walking its bytes.
+///
+/// Most versions seen during ingest are bare release triples, so this skips
+/// the full semver parser for them. Returns `None` on any other byte
+/// (pre-release, build metadata, wrong segment count, leading zeros) so the
+/// caller can fall back to `Version::parse`.
+fn parse_release_only(version: &str) -> Option<Version> {
+    let mut segments = [0u64; 3];
+    let mut segment = 0;
+    let mut digits = 0;
+    for &byte in version.as_bytes() {
+        match byte {
+            b'0'..=b'9' => {
+                // semver rejects leading zeros ("01.0.0"); let the full
+                // parser produce the error message.
+                if digits == 1 && segments[segment] == 0 {
+                    return None;
+                }
+                segments[segment] = segments[segment]
+                    .checked_mul(10)?
+                    .checked_add(u64::from(byte - b'0'))?;
+                digits += 1;
+            }
+            b'.' => {
+                if digits == 0 || segment == 2 {
+                    return None;
+                }
+                segment += 1;
+                digits = 0;
+            }
+            _ => return None,
+        }
+    }
+    if segment != 2 || digits == 0 {
+        return None;
+    }
+    Some(Version::new(segments[0], segments[1], segments[2]))
+}
 
 /// Parse a semver version string.
 pub fn parse_version(version: &str) -> Result<Version, ResolverError> {
+    if let Some(parsed) = parse_release_only(version) {
+        return Ok(parsed);
+    }
     Version::parse(version).map_err(|e| ResolverError::InvalidVersion {
         version: version.to_string(),
         reason: e.to_string(),
     })
 }
 
-/// Parse a single constraint operator and version into a Range.
-fn parse_single_constraint(constraint: &str) -> Result<Ranges<Version>, ResolverError> {
-    let constraint = constraint.trim();
-
-    if constraint.is_empty() || constraint == "*" {
-        return Ok(Ranges::full());
-    }
-
-    // Handle compatible release operator ~=
-    if let Some(ver_str) = constraint.strip_prefix("~=") {
-        let ver_str = ver_str.trim();
-        let version = parse_version(ver_str)?;
-        let next_minor = Version::new(version.major, version.minor + 1, 0);
-        return Ok(Ranges::between(version, next_minor));
-    }
-
-    // Handle comparison operators
-    if let Some(ver_str) = constraint.strip_prefix(">=") {
-        let version = parse_version(ver_str.trim())?;
-        return Ok(Ranges::higher_than(version));
-    }
-
-    if let Some(ver_str) = constraint.strip_prefix("<=") {
-        let version = parse_version(ver_str.trim())?;
-        let next = Version::new(version.major, version.minor, version.patch + 1);
-        return Ok(Ranges::strictly_lower_than(next));
-    }
-
-    if let Some(ver_str) = constraint.strip_prefix("!=") {
-        let version = parse_version(ver_str.trim())?;
-        let next = Version::new(version.major, version.minor, version.patch + 1);
-        let below = Ranges::strictly_lower_than(version.clone());
-        let above = Ranges::higher_than(next);
-        return Ok(below.union(&above));
-    }
-
-    if let Some(ver_str) = constraint.strip_prefix("==") {
-        let version = parse_version(ver_str.trim())?;
-        return Ok(Ranges::singleton(version));
-    }
-
-    if let Some(ver_str) = constraint.strip_prefix('>') {
-        let version = parse_version(ver_str.trim())?;
-        let next = Version::new(version.major, version.minor, version.patch + 1);
-        return Ok(Ranges::higher_than(next));
-    }
+/// Constraint operators recognized by the tokenizer.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+enum Op {
+    Compatible, // ~=
+    GreaterEq,  // >=
+    LessEq,     // <=
+    Equal,      // ==
+    NotEqual,   // !=
+    Greater,    // >
+    Less,       // <
+    Exact,      // bare version
+}
 
-    if let Some(ver_str) = constraint.strip_prefix('<') {
-        let version = parse_version(ver_str.trim())?;
-        return Ok(Ranges::strictly_lower_than(version));
+/// Split one clause into its operator and version text in a single scan.
+///
+/// The operator is decided by matching the first two bytes, and a leftover
+/// operator byte in front of the version (as in `>>invalid<<`) is flagged
+/// immediately instead of being handed to the version parser.
+fn tokenize_clause<'a>(clause: &'a str, constraint: &str) -> Result<(Op, &'a str), ResolverError> {
+    let invalid = |reason: String| ResolverError::InvalidConstraint {
+        constraint: constraint.to_string(),
+        reason,
+    };
+
+    let bytes = clause.as_bytes();
+    let (op, op_len) = match (bytes.first(), bytes.get(1)) {
+        (Some(b'~'), Some(b'=')) => (Op::Compatible, 2),
+        (Some(b'>'), Some(b'=')) => (Op::GreaterEq, 2),
+        (Some(b'<'), Some(b'=')) => (Op::LessEq, 2),
+        (Some(b'='), Some(b'=')) => (Op::Equal, 2),
+        (Some(b'!'), Some(b'=')) => (Op::NotEqual, 2),
+        (Some(b'>'), _) => (Op::Greater, 1),
+        (Some(b'<'), _) => (Op::Less, 1),
+        (Some(b'~'), _) | (Some(b'='), _) | (Some(b'!'), _) => {
+            return Err(invalid(format!("unrecognized operator in '{}'", clause)));
+        }
+        _ => (Op::Exact, 0),
+    };
+
+    let version = clause[op_len..].trim();
+    if version
+        .bytes()
+        .next()
+        .is_some_and(|b| matches!(b, b'<' | b'>' | b'=' | b'!' | b'~'))
+    {
+        return Err(invalid(format!("unrecognized operator in '{}'", clause)));
     }
+    Ok((op, version))
+}
 
-    // No operator means exact match
-    let version = parse_version(constraint)?;
-    Ok(Ranges::singleton(version))
+/// Build the range for a single tokenized clause.
+fn clause_range(op: Op, ver_str: &str) -> Result<Ranges<Version>, ResolverError> {
+    let version = parse_version(ver_str)?;
+    Ok(match op {
+        Op::Compatible => {
+            let next_minor = Version::new(version.major, version.minor + 1, 0);
+            Ranges::between(version, next_minor)
+        }
+        Op::GreaterEq => Ranges::higher_than(version),
+        Op::LessEq => {
+            let next = Version::new(version.major, version.minor, version.patch + 1);
+            Ranges::strictly_lower_than(next)
+        }
+        Op::NotEqual => {
+            let next = Version::new(version.major, version.minor, version.patch + 1);
+            let below = Ranges::strictly_lower_than(version.clone());
+            let above = Ranges::higher_than(next);
+            below.union(&above)
+        }
+        Op::Greater => {
+            let next = Version::new(version.major, version.minor, version.patch + 1);
+            Ranges::higher_than(next)
+        }
+        Op::Less => Ranges::strictly_lower_than(version),
+        Op::Equal | Op::Exact => Ranges::singleton(version),
+    })
 }
 
 /// Parse a PEP 440 constraint string into pubgrub Ranges.
@@ -75,23 +138,15 @@ fn parse_single_constraint(constraint: &str) -> Result<Ranges<Version>, Resolver
 /// Supports: >=, <=, >, <, ==, !=, ~= (compatible release)
 /// Combined constraints: ">=1.0.0,<2.0.0"
 pub fn parse_constraint(constraint: &str) -> Result<Ranges<Version>, ResolverError> {
-    let constraint = constraint.trim();
-
-    if constraint.is_empty() || constraint == "*" {
-        return Ok(Ranges::full());
-    }
-
-    let parts: Vec<&str> = constraint.split(',').map(|s| s.trim()).collect();
-
     let mut result = Ranges::full();
-    for part in parts {
-        if part.is_empty() {
+    for clause in constraint.split(',') {
+        let clause = clause.trim();
+        if clause.is_empty() || clause == "*" {
             continue;
         }
-        let range = parse_single_constraint(part)?;
-        result = result.intersection(&range);
+        let (op, ver_str) = tokenize_clause(clause, constraint)?;
+        result = result.intersection(&clause_range(op, ver_str)?);
     }
-
     Ok(result)
 }
 
@@ -107,6 +162,36 @@ mod tests {
         assert!(parse_version("invalid").is_err());
     }
 
+    #[test]
+    fn test_parse_release_only_matches_full_parser() {
+        for input in ["1.0.0", "0.1.0", "10.20.30", "184467.4407.3709"] {
+            assert_eq!(
+                parse_release_only(input),
+                Some(Version::parse(input).unwrap())
+            );
+        }
+        // Anything non-trivial falls back to the full parser.
+        for input in [
+            "1.0",
+            "1.0.0.0",
+            "1.0.0-alpha",
+            "1.0.0+build",
+            "01.0.0",
+            "1..0",
+            "",
+        ] {
+            assert_eq!(parse_release_only(input), None);
+        }
+    }
+
+    #[test]
+    fn test_parse_version_prerelease_falls_back() {
+        assert_eq!(
+            parse_version("1.0.0-alpha.1").unwrap(),
+            Version::parse("1.0.0-alpha.1").unwrap()
+        );
+    }
+
     #[test]
     fn test_parse_constraint_operators() {
         assert!(parse_constraint(">=1.0.0").is_ok());
@@ -118,6 +203,34 @@ mod tests {
         assert!(parse_constraint("~=1.4.0").is_ok());
     }
 
+    #[test]
+    fn test_parse_constraint_rejects_malformed_operators() {
+        for input in [
+            ">>invalid<<",
+            "=1.0.0",
+            "~1.0.0",
+            "!1.0.0",
+            ">=<1.0.0",
+            "==>1.0.0",
+        ] {
+            let err = parse_constraint(input).unwrap_err();
+            assert!(
+                matches!(err, ResolverError::InvalidConstraint { .. }),
+                "{input}: {err}"
+            );
+        }
+    }
+
+    #[test]
+    fn test_parse_constraint_wildcard_and_empty() {
+        for input in ["", "*", " * ", ">=1.0.0,*"] {
+            assert!(parse_constraint(input).is_ok(), "{input}");
+        }
+        assert!(parse_constraint("*")
+            .unwrap()
+            .contains(&Version::new(0, 0, 1)));
+    }
+
     #[test]
     fn test_parse_constraint_combined() {
         let range = parse_constraint(">=1.0.0,<2.0.0").unwrap();
@@ -8,12 +8,16 @@ use pyo3::prelude::*;
 mod constraint;
 mod error;
 mod package;
+mod provider;
 mod resolver;
+mod version;
 
 pub use constraint::{parse_constraint, parse_version};
 pub use error::ResolverError;
 pub use package::Package;
+pub use provider::PackageStore;
 pub use resolver::Resolver;
+pub use version::Version;
 
 // Python exception for resolution errors.
 pyo3::create_exception!(pubgrub_py, ResolutionError, pyo3::exceptions::PyException);
@@ -0,0 +1,529 @@
+//! In-memory dependency store backing the resolver.
+//!
+//! Replaces pubgrub's BTreeMap-based `OfflineDependencyProvider` with
+//! per-package parallel vectors: one contiguous `Vec<Version>` sorted in
+//! descending order and a matching `Vec` of dependency sets. The solver's
+//! hot "pick highest matching version" loop then walks contiguous memory
+//! instead of chasing tree nodes.
+
+use std::cmp::Reverse;
+use std::convert::Infallible;
+use std::fmt::{self, Display};
+use std::ops::Bound;
+
+use pubgrub::{
+    Dependencies, DependencyConstraints, DependencyProvider, PackageResolutionStatistics, Ranges,
+};
+use rustc_hash::FxHashMap;
+
+use crate::package::Package;
+use crate::version::Version;
+
+/// Per-package storage: versions with the dependency set of `versions[i]`
+/// held at `dependencies[i]`.
+///
+/// Versions are appended in arrival order during ingest and sorted
+/// descending once by [`PackageStore::freeze`] before resolution, so
+/// lookups can assume descending order.
+#[derive(Debug, Default)]
+struct PackageEntry {
+    versions: Vec<Version>,
+    dependencies: Vec<DependencyConstraints<Package, Ranges<Version>>>,
+    /// Exact-version lookup built by [`PackageStore::freeze`], mapping each
+    /// version to its index in the sorted vectors.
+    index: FxHashMap<Version, usize>,
+    sorted: bool,
+}
+
+impl PackageEntry {
+    /// Index of `version` in the version vector.
+    fn position(&self, version: &Version) -> Option<usize> {
+        if self.sorted {
+            self.versions
+                .binary_search_by(|probe| version.cmp(probe))
+                .ok()
+        } else {
+            self.versions.iter().position(|v| v == version)
+        }
+    }
+
+    /// Sort both parallel vectors by descending version and (re)build the
+    /// exact-version index when versions were appended since the last call.
+    fn sort(&mut self) {
+        if !self.sorted {
+            let versions = std::mem::take(&mut self.versions);
+            let dependencies = std::mem::take(&mut self.dependencies);
+            let mut pairs: Vec<_> = versions.into_iter().zip(dependencies).collect();
+            pairs.sort_by(|a, b| b.0.cmp(&a.0));
+            for (version, deps) in pairs {
+                self.versions.push(version);
+                self.dependencies.push(deps);
+            }
+            self.sorted = true;
+            self.index.clear();
+        }
+        if self.index.len() != self.versions.len() {
+            self.index = self
+                .versions
+                .iter()
+                .enumerate()
+                .map(|(i, v)| (v.clone(), i))
+                .collect();
+        }
+    }
+
+    /// Half-open index window of versions that can possibly satisfy `range`,
+    /// derived from its bounding interval via binary search. Only valid on a
+    /// sorted (descending) entry.
+    fn bounded_window(&self, range: &Ranges<Version>) -> (usize, usize) {
+        let Some((lower, upper)) = range.bounding_range() else {
+            return (0, 0); // Empty range matches nothing.
+        };
+        let start = self.versions.partition_point(|v| match upper {
+            Bound::Included(u) => v > u,
+            Bound::Excluded(u) => v >= u,
+            Bound::Unbounded => false,
+        });
+        let end = self.versions.partition_point(|v| match lower {
+            Bound::Included(l) => v >= l,
+            Bound::Excluded(l) => v > l,
+            Bound::Unbounded => true,
+        });
+        (start, end.max(start))
+    }
+}
+
+/// A union range lowered to packed integer bounds, one entry per segment.
+///
+/// Bit 0 of `incl` marks the lower bound inclusive, bit 1 the upper. The
+/// per-version check is then two integer comparisons and a mask test per
+/// segment — no branching on version fields. Only built when every bound
+/// is a plain release; exotic bounds keep the general contains() path.
+struct PackedSegments(Vec<(u128, u128, u8)>);
+
+impl PackedSegments {
+    fn try_from_range(range: &Ranges<Version>) -> Option<Self> {
+        let mut segments = Vec::new();
+        for (lower, upper) in range.iter() {
+            let (lo, lo_incl) = match lower {
+                Bound::Included(v) => (!v.is_exotic()).then(|| (v.packed(), 1))?,
+                Bound::Excluded(v) => (!v.is_exotic()).then(|| (v.packed(), 0))?,
+                Bound::Unbounded => (0, 1),
+            };
+            let (hi, hi_incl) = match upper {
+                Bound::Included(v) => (!v.is_exotic()).then(|| (v.packed(), 2))?,
+                Bound::Excluded(v) => (!v.is_exotic()).then(|| (v.packed(), 0))?,
+                Bound::Unbounded => (u128::MAX, 2),
+            };
+            segments.push((lo, hi, lo_incl | hi_incl));
+        }
+        Some(PackedSegments(segments))
+    }
+
+    fn matches(&self, v: u128) -> bool {
+        self.0.iter().any(|&(lo, hi, incl)| {
+            (v > lo || (incl & 1 != 0 && v == lo)) && (v < hi || (incl & 2 != 0 && v == hi))
+        })
+    }
+}
+
+/// Reason a package version's dependencies are unavailable.
+///
+/// A cheap copyable marker instead of a String, so the search loop never
+/// allocates diagnostic text for incompatibilities that may never surface;
+/// the message is rendered only when a derivation tree is reported.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum UnavailableReason {
+    /// The (package, version) pair was never registered with the store.
+    DependenciesUnknown,
+}
+
+impl Display for UnavailableReason {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        match self {
+            UnavailableReason::DependenciesUnknown => {
+                f.write_str("its dependencies could not be determined")
+            }
+        }
+    }
+}
+
+/// A [DependencyProvider] holding all dependency information in memory.
+///
+/// Mirrors the selection behavior of pubgrub's `OfflineDependencyProvider`:
+/// packages with fewer matching versions are decided first and the highest
+/// matching version is picked.
+#[derive(Debug, Default)]
+pub struct PackageStore {
+    packages: FxHashMap<Package, PackageEntry>,
+    /// Whether every entry is sorted and indexed, i.e. no version was
+    /// appended since the last [`PackageStore::freeze`].
+    frozen: bool,
+    /// Bumped on every mutation, so callers can detect whether the store
+    /// changed while they were computing something derived from it.
+    generation: u64,
+}
+
+impl PackageStore {
+    /// Creates an empty store.
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Creates an empty store with room for `capacity` packages, avoiding
+    /// rehashes while a large index is ingested.
+    pub fn with_capacity(capacity: usize) -> Self {
+        PackageStore {
+            packages: FxHashMap::with_capacity_and_hasher(capacity, Default::default()),
+            frozen: false,
+            generation: 0,
+        }
+    }
+
+    /// Register a package version and its dependencies, replacing any
+    /// dependencies previously stored for that exact version.
+    pub fn add(
+        &mut self,
+        package: Package,
+        version: Version,
+        dependencies: impl IntoIterator<Item = (Package, Ranges<Version>)>,
+    ) {
+        self.generation += 1;
+        let entry = self.packages.entry(package).or_default();
+        let deps = dependencies.into_iter().collect();
+        if let Some(idx) = entry.position(&version) {
+            entry.dependencies[idx] = deps;
+            return;
+        }
+        // Append now; freeze() sorts once before resolution instead of
+        // paying an ordered insert (and its memmove) per version.
+        entry.sorted = entry.versions.is_empty()
+            || (entry.sorted && *entry.versions.last().unwrap() > version);
+        entry.versions.push(version);
+        entry.dependencies.push(deps);
+        self.frozen = false;
+    }
+
+    /// Sort all version vectors descending. Called once per resolution;
+    /// entries that are already sorted are left untouched.
+    pub fn freeze(&mut self) {
+        if self.frozen {
+            return;
+        }
+        for entry in self.packages.values_mut() {
+            entry.sort();
+        }
+        self.frozen = true;
+    }
+
+    /// Whether [`PackageStore::freeze`] has run since the last append, so
+    /// callers can skip taking a write lock on an already-frozen store.
+    pub fn is_frozen(&self) -> bool {
+        self.frozen
+    }
+
+    /// The current mutation count. Two equal values bracket a span with no
+    /// intervening [`PackageStore::add`].
+    pub fn generation(&self) -> u64 {
+        self.generation
+    }
+}
+
+impl DependencyProvider for PackageStore {
+    type P = Package;
+    type V = Version;
+    type VS = Ranges<Version>;
+    type M = UnavailableReason;
+    type Err = Infallible;
+    type Priority = (u32, Reverse<usize>);
+
+    #[inline]
+    fn choose_version(
+        &self,
+        package: &Package,
+        range: &Ranges<Version>,
+    ) -> Result<Option<Version>, Infallible> {
+        Ok(self.packages.get(package).and_then(|entry| {
+            // An == constraint narrows the range to one version; answer it
+            // with a single hash lookup instead of a range scan.
+            if let Some(exact) = range.as_singleton() {
+                return entry.index.get(exact).map(|&i| entry.versions[i].clone());
+            }
+            let (start, end) = entry.bounded_window(range);
+            let window = &entry.versions[start..end];
+            // Sorted descending, so the first match is the highest version.
+            // For single-interval ranges the window is exact and the first
+            // candidate is the answer; union ranges with gaps still need a
+            // per-version filter, run on packed bounds where possible.
+            if range.iter().nth(1).is_none() {
+                return window.first().cloned();
+            }
+            match PackedSegments::try_from_range(range) {
+                Some(packed) => window
+                    .iter()
+                    .find(|v| {
+                        if v.is_exotic() {
+                            range.contains(v)
+                        } else {
+                            packed.matches(v.packed())
+                        }
+                    })
+                    .cloned(),
+                None => window.iter().find(|v| range.contains(v)).cloned(),
+            }
+        }))
+    }
+
+    #[inline]
+    fn prioritize(
+        &self,
+        package: &Package,
+        range: &Ranges<Version>,
+        package_statistics: &PackageResolutionStatistics,
+    ) -> Self::Priority {
+        let version_count = self
+            .packages
+            .get(package)
+            .map(|entry| {
+                if let Some(exact) = range.as_singleton() {
+                    return usize::from(entry.index.contains_key(exact));
+                }
+                let (start, end) = entry.bounded_window(range);
+                if range.iter().nth(1).is_none() {
+                    // Single contiguous interval: the window is exact.
+                    end - start
+                } else if let Some(packed) = PackedSegments::try_from_range(range) {
+                    entry.versions[start..end]
+                        .iter()
+                        .filter(|v| {
+                            if v.is_exotic() {
+                                range.contains(v)
+                            } else {
+                                packed.matches(v.packed())
+                            }
+                        })
+                        .count()
+                } else {
+                    entry.versions[start..end]
+                        .iter()
+                        .filter(|v| range.contains(v))
+                        .count()
+                }
+            })
+            .unwrap_or(0);
+        if version_count == 0 {
+            return (u32::MAX, Reverse(0));
+        }
+        (package_statistics.conflict_count(), Reverse(version_count))
+    }
+
+    #[inline]
+    fn get_dependencies(
+        &self,
+        package: &Package,
+        version: &Version,
+    ) -> Result<Dependencies<Package, Ranges<Version>, UnavailableReason>, Infallible> {
+        let deps = self.packages.get(package).and_then(|entry| {
+            entry
+                .position(version)
+                .map(|i| entry.dependencies[i].clone())
+        });
+        Ok(match deps {
+            None => Dependencies::Unavailable(UnavailableReason::DependenciesUnknown),
+            Some(deps) => Dependencies::Available(deps),
+        })
+    }
+}
+
+/// A per-resolution view pairing a shared [`PackageStore`] with that
+/// resolution's synthetic root package.
+///
+/// The root's dependencies are the caller's requirements and differ from
+/// one resolve() call to the next, so they are answered from this overlay
+/// instead of being written into the shared store. Concurrent resolutions
+/// can then read the same frozen store without clobbering each other's
+/// root entry.
+pub(crate) struct RootedStore<'a> {
+    pub(crate) store: &'a PackageStore,
+    pub(crate) root: Package,
+    pub(crate) root_version: Version,
+    pub(crate) root_deps: DependencyConstraints<Package, Ranges<Version>>,
+}
+
+impl DependencyProvider for RootedStore<'_> {
+    type P = Package;
+    type V = Version;
+    type VS = Ranges<Version>;
+    type M = UnavailableReason;
+    type Err = Infallible;
+    type Priority = (u32, Reverse<usize>);
+
+    fn choose_version(
+        &self,
+        package: &Package,
+        range: &Ranges<Version>,
+    ) -> Result<Option<Version>, Infallible> {
+        if *package == self.root {
+            return Ok(range
+                .contains(&self.root_version)
+                .then(|| self.root_version.clone()));
+        }
+        self.store.choose_version(package, range)
+    }
+
+    fn prioritize(
+        &self,
+        package: &Package,
+        range: &Ranges<Version>,
+        package_statistics: &PackageResolutionStatistics,
+    ) -> Self::Priority {
+        if *package == self.root {
+            if !range.contains(&self.root_version) {
+                return (u32::MAX, Reverse(0));
+            }
+            return (package_statistics.conflict_count(), Reverse(1));
+        }
+        self.store.prioritize(package, range, package_statistics)
+    }
+
+    fn get_dependencies(
+        &self,
+        package: &Package,
+        version: &Version,
+    ) -> Result<Dependencies<Package, Ranges<Version>, UnavailableReason>, Infallible> {
+        if *package == self.root {
+            return Ok(if *version == self.root_version {
+                Dependencies::Available(self.root_deps.clone())
+            } else {
+                Dependencies::Unavailable(UnavailableReason::DependenciesUnknown)
+            });
+        }
+        self.store.get_dependencies(package, version)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn version(s: &str) -> Version {
+        Version::parse(s).unwrap()
+    }
+
+    #[test]
+    fn test_freeze_sorts_versions_descending() {
+        let mut store = PackageStore::new();
+        for v in ["1.0.0", "2.1.0", "0.9.0", "2.0.0"] {
+            store.add(Package::from("pkg"), version(v), []);
+        }
+        store.freeze();
+        let entry = &store.packages[&Package::from("pkg")];
+        let got: Vec<String> = entry.versions.iter().map(|v| v.to_string()).collect();
+        assert_eq!(got, ["2.1.0", "2.0.0", "1.0.0", "0.9.0"]);
+    }
+
+    #[test]
+    fn test_choose_version_picks_highest_matching() {
+        let mut store = PackageStore::new();
+        for v in ["1.0.0", "1.5.0", "2.0.0"] {
+            store.add(Package::from("pkg"), version(v), []);
+        }
+        store.freeze();
+        let range = Ranges::between(version("1.0.0"), version("2.0.0"));
+        let chosen = store.choose_version(&Package::from("pkg"), &range).unwrap();
+        assert_eq!(chosen, Some(version("1.5.0")));
+    }
+
+    #[test]
+    fn test_bounded_window_brackets_constraint() {
+        let mut store = PackageStore::new();
+        for v in ["0.9.0", "1.0.0", "1.5.0", "2.0.0", "3.0.0"] {
+            store.add(Package::from("pkg"), version(v), []);
+        }
+        store.freeze();
+        let entry = &store.packages[&Package::from("pkg")];
+        // >=1.0.0, <2.0.0 over [3.0.0, 2.0.0, 1.5.0, 1.0.0, 0.9.0]
+        let range = Ranges::between(version("1.0.0"), version("2.0.0"));
+        assert_eq!(entry.bounded_window(&range), (2, 4));
+        assert_eq!(entry.bounded_window(&Ranges::empty()), (0, 0));
+        assert_eq!(entry.bounded_window(&Ranges::full()), (0, 5));
+    }
+
+    #[test]
+    fn test_choose_version_exact_constraint() {
+        let mut store = PackageStore::new();
+        for v in ["1.0.0", "1.2.0", "1.5.0"] {
+            store.add(Package::from("pkg"), version(v), []);
+        }
+        store.freeze();
+        let exact = Ranges::singleton(version("1.2.0"));
+        let chosen = store.choose_version(&Package::from("pkg"), &exact).unwrap();
+        assert_eq!(chosen, Some(version("1.2.0")));
+
+        let missing = Ranges::singleton(version("9.9.9"));
+        assert_eq!(
+            store
+                .choose_version(&Package::from("pkg"), &missing)
+                .unwrap(),
+            None
+        );
+    }
+
+    #[test]
+    fn test_packed_segments_match_contains() {
+        // != 1.5.0 produces a two-segment union range.
+        let range = crate::parse_constraint("!=1.5.0").unwrap();
+        let packed = PackedSegments::try_from_range(&range).unwrap();
+        for v in ["1.0.0", "1.5.0", "1.5.1", "2.0.0"] {
+            let v = version(v);
+            assert_eq!(packed.matches(v.packed()), range.contains(&v), "{v}");
+        }
+        // Exotic bounds refuse the packed lowering.
+        let prerelease = Ranges::higher_than(version("1.0.0-alpha"));
+        assert!(PackedSegments::try_from_range(&prerelease).is_none());
+    }
+
+    #[test]
+    fn test_rooted_store_overlays_root() {
+        let mut store = PackageStore::new();
+        store.add(Package::from("pkg"), version("1.0.0"), []);
+        store.freeze();
+        let root = Package::from("__root__");
+        let rooted = RootedStore {
+            store: &store,
+            root: root.clone(),
+            root_version: version("0.0.0"),
+            root_deps: [(Package::from("pkg"), Ranges::full())]
+                .into_iter()
+                .collect(),
+        };
+        // Root questions are answered from the overlay, everything else
+        // delegates, and the shared store never grows a root entry.
+        assert_eq!(
+            rooted.choose_version(&root, &Ranges::full()).unwrap(),
+            Some(version("0.0.0"))
+        );
+        assert_eq!(
+            rooted
+                .choose_version(&Package::from("pkg"), &Ranges::full())
+                .unwrap(),
+            Some(version("1.0.0"))
+        );
+        assert!(!store.packages.contains_key(&root));
+        match rooted.get_dependencies(&root, &version("0.0.0")).unwrap() {
+            Dependencies::Available(deps) => assert!(deps.contains_key(&Package::from("pkg"))),
+            Dependencies::Unavailable(_) => panic!("root dependencies should be available"),
+        }
+    }
+
+    #[test]
+    fn test_re_adding_version_replaces_dependencies() {
+        let mut store = PackageStore::new();
+        let dep = (Package::from("dep"), Ranges::full());
+        store.add(Package::from("pkg"), version("1.0.0"), [dep]);
+        store.add(Package::from("pkg"), version("1.0.0"), []);
+        let entry = &store.packages[&Package::from("pkg")];
+        assert_eq!(entry.versions.len(), 1);
+        assert!(entry.dependencies[0].is_empty());
+    }
+}
@@ -1,26 +1,80 @@
 //! The main Resolver class exposed to Python.
 
-use pubgrub::{DefaultStringReporter, OfflineDependencyProvider, PubGrubError, Ranges, Reporter};
+use pubgrub::{DefaultStringReporter, DependencyConstraints, PubGrubError, Ranges, Reporter};
 use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
-use semver::Version;
+use pyo3::types::{PyDict, PyString};
+use rayon::prelude::*;
+use rustc_hash::{FxHashMap, FxHashSet};
 use std::collections::HashMap;
+use std::sync::{Mutex, RwLock};
 
 use crate::constraint::{parse_constraint, parse_version};
+use crate::error::ResolverError;
 use crate::package::Package;
+use crate::provider::{PackageStore, RootedStore};
+use crate::version::Version;
 use crate::ResolutionError;
 
+/// Number of top-level packages above which add_packages snapshots the
+/// input and parses it in parallel. Small indexes stay on the serial
+/// zero-copy path, which has no snapshot cost.
+const PARALLEL_INGEST_THRESHOLD: usize = 64;
+
+/// Sorted (package, constraint) pairs identifying one resolve() call.
+type Requirements = Vec<(String, String)>;
+/// A resolved {package: version} assignment.
+type Solution = HashMap<String, String>;
+
+/// Every method takes `&self`, with the mutable state behind locks: an
+/// exclusive `&mut self` borrow would be held across the GIL-free solver
+/// search, making a second thread's call on the same object fail with
+/// "Already borrowed" instead of waiting. With shared borrows, concurrent
+/// resolve() calls read-lock the store and search in parallel.
 #[pyclass]
 pub struct Resolver {
-    provider: OfflineDependencyProvider<Package, Ranges<Version>>,
+    store: RwLock<PackageStore>,
+    /// Interned package names. Every `Package` handed to the store or to
+    /// dependency edges comes from this set, so a name appearing across
+    /// thousands of versions is allocated once and shared by Arc clones.
+    interner: Mutex<FxHashSet<Package>>,
+    /// Memo of parsed constraints keyed by the raw string. Dependency dicts
+    /// repeat the same handful of constraint strings across many versions,
+    /// so parsing each distinct string once amortizes the parser cost.
+    constraint_cache: Mutex<FxHashMap<String, Ranges<Version>>>,
+    /// Memo of successful resolutions keyed by the sorted requirements.
+    /// Invalidated whenever a package is added, since new versions can
+    /// change which solution is picked.
+    solution_cache: Mutex<FxHashMap<Requirements, Solution>>,
+    /// Interned Python string objects for package names, reused as result
+    /// dict keys across resolve() calls.
+    py_names: Mutex<FxHashMap<String, Py<PyString>>>,
 }
 
 #[pymethods]
 impl Resolver {
+    /// Create a new resolver.
+    ///
+    /// Args:
+    ///     capacity_hint: Expected number of (package, version) pairs.
+    ///         Preallocates the internal tables so ingesting a large index
+    ///         does not trigger repeated rehashes and reallocations.
     #[new]
-    pub fn new() -> Self {
+    #[pyo3(signature = (capacity_hint=None))]
+    pub fn new(capacity_hint: Option<usize>) -> Self {
+        let capacity = capacity_hint.unwrap_or(0);
         Resolver {
-            provider: OfflineDependencyProvider::new(),
+            store: RwLock::new(PackageStore::with_capacity(capacity)),
+            interner: Mutex::new(FxHashSet::with_capacity_and_hasher(
+                capacity,
+                Default::default(),
+            )),
+            constraint_cache: Mutex::new(FxHashMap::with_capacity_and_hasher(
+                capacity,
+                Default::default(),
+            )),
+            solution_cache: Mutex::new(FxHashMap::default()),
+            py_names: Mutex::new(FxHashMap::default()),
         }
     }
 
@@ -35,28 +89,64 @@ impl Resolver {
     ///     ValueError: If version or constraint format is invalid
     #[pyo3(signature = (name, version, dependencies=None))]
     pub fn add_package(
-        &mut self,
-        name: String,
-        version: String,
-        dependencies: Option<HashMap<String, String>>,
+        &self,
+        name: &str,
+        version: &str,
+        dependencies: Option<&Bound<'_, PyDict>>,
     ) -> PyResult<()> {
-        let pkg = Package::from(name);
-        let ver = parse_version(&version).map_err(|e| PyValueError::new_err(e.to_string()))?;
-
-        let deps: Vec<(Package, Ranges<Version>)> = match dependencies {
-            Some(deps_map) => {
-                let mut result = Vec::with_capacity(deps_map.len());
-                for (dep_name, constraint) in deps_map {
-                    let range = parse_constraint(&constraint)
-                        .map_err(|e| PyValueError::new_err(e.to_string()))?;
-                    result.push((Package::from(dep_name), range));
-                }
-                result
-            }
+        let pkg = self.intern(name);
+        let ver = parse_version(version).map_err(|e| PyValueError::new_err(e.to_string()))?;
+        let deps = match dependencies {
+            Some(deps) => self.parse_deps(deps)?,
             None => Vec::new(),
         };
 
-        self.provider.add_dependencies(pkg, ver, deps);
+        self.solution_cache.lock().unwrap().clear();
+        self.store.write().unwrap().add(pkg, ver, deps);
+        Ok(())
+    }
+
+    /// Add many packages with their versions and dependencies in one call.
+    ///
+    /// Accepts the same nested mapping as `resolve()`'s `available` argument
+    /// and iterates it on the Rust side, so the Python/Rust boundary is
+    /// crossed once instead of once per (package, version) pair.
+    ///
+    /// Args:
+    ///     available: Dict of {package: {version: {dep: constraint}}}
+    ///
+    /// Raises:
+    ///     ValueError: If a version or constraint format is invalid. The
+    ///         batch is validated up front, so a failure adds nothing.
+    pub fn add_packages(&self, available: &Bound<'_, PyDict>) -> PyResult<()> {
+        if available.len() >= PARALLEL_INGEST_THRESHOLD {
+            return self.add_packages_parallel(available);
+        }
+        // Parse the whole batch before touching the store, so a bad entry
+        // anywhere rejects the batch with the resolver unchanged — the
+        // same atomic failure semantics as the parallel path. Strings are
+        // borrowed straight out of their Python objects; the interner and
+        // parser work on &str, so nothing is copied unless it is retained.
+        let mut parsed = Vec::with_capacity(available.len());
+        for (pkg, versions) in available.iter() {
+            let pkg = self.intern(pkg.downcast::<PyString>()?.to_str()?);
+            let versions = versions.downcast::<PyDict>()?;
+            let mut entries = Vec::with_capacity(versions.len());
+            for (ver, deps) in versions.iter() {
+                let ver = parse_version(ver.downcast::<PyString>()?.to_str()?)
+                    .map_err(|e| PyValueError::new_err(e.to_string()))?;
+                entries.push((ver, self.parse_deps(deps.downcast::<PyDict>()?)?));
+            }
+            parsed.push((pkg, entries));
+        }
+
+        self.solution_cache.lock().unwrap().clear();
+        let mut store = self.store.write().unwrap();
+        for (pkg, entries) in parsed {
+            for (ver, deps) in entries {
+                store.add(pkg.clone(), ver, deps);
+            }
+        }
         Ok(())
     }
 
@@ -72,49 +162,214 @@ impl Resolver {
     ///     ResolutionError: If no valid solution exists (with explanation)
     pub fn resolve(
         &self,
+        py: Python<'_>,
         requirements: HashMap<String, String>,
-    ) -> PyResult<HashMap<String, String>> {
-        let root = Package::from("__root__");
+    ) -> PyResult<Py<PyDict>> {
+        // Probe the solution memo before doing any work. Requirements are
+        // canonicalized by sorting so dict ordering does not matter.
+        let mut cache_key: Requirements = requirements
+            .iter()
+            .map(|(k, v)| (k.clone(), v.clone()))
+            .collect();
+        cache_key.sort();
+        let cached = self.solution_cache.lock().unwrap().get(&cache_key).cloned();
+        if let Some(solution) = cached {
+            return self.build_result(py, &solution);
+        }
+
+        let root = self.intern("__root__");
         let root_version = Version::new(0, 0, 0);
 
-        // Build the root dependencies
-        let mut root_deps: Vec<(Package, Ranges<Version>)> = Vec::with_capacity(requirements.len());
+        // Build the root dependencies. They differ per call, so they feed a
+        // per-resolution RootedStore overlay instead of being written into
+        // the shared store.
+        let mut root_deps = DependencyConstraints::default();
         for (pkg_name, constraint) in &requirements {
-            let range =
-                parse_constraint(constraint).map_err(|e| PyValueError::new_err(e.to_string()))?;
-            root_deps.push((Package::from(pkg_name.as_str()), range));
+            let range = self.cached_constraint(constraint)?;
+            root_deps.insert(self.intern(pkg_name), range);
         }
 
-        // Create a new provider with the root package
-        let mut provider = self.provider.clone();
-        provider.add_dependencies(root.clone(), root_version.clone(), root_deps);
-
-        // Resolve
-        match pubgrub::resolve(&provider, root.clone(), root_version) {
-            Ok(solution) => {
-                let mut result = HashMap::new();
-                for (pkg, ver) in solution {
-                    let pkg_name = pkg.0.to_string();
-                    if pkg_name != "__root__" {
-                        result.insert(pkg_name, ver.to_string());
+        // Resolve. The requirements were already converted to pure-Rust
+        // structures above, so the search itself can run without the GIL
+        // and concurrent resolves from a thread pool proceed in parallel,
+        // each under its own read lock on the frozen store.
+        let (solution, generation) = py.allow_threads(|| {
+            // An ingest can slip in between freezing and taking the read
+            // guard, leaving unsorted versions the search must not see.
+            // Recheck under the guard the search will actually use and
+            // loop back to the freeze path if it fails.
+            let store = loop {
+                if !self.store.read().unwrap().is_frozen() {
+                    self.store.write().unwrap().freeze();
+                }
+                let guard = self.store.read().unwrap();
+                if guard.is_frozen() {
+                    break guard;
+                }
+            };
+            let generation = store.generation();
+            let provider = RootedStore {
+                store: &store,
+                root: root.clone(),
+                root_version: root_version.clone(),
+                root_deps,
+            };
+            // Lower the error to a PyErr inside the closure so nothing
+            // tied to the read guard's lifetime escapes it.
+            pubgrub::resolve(&provider, root.clone(), root_version.clone())
+                .map(|solution| (solution, generation))
+                .map_err(|err| match err {
+                    PubGrubError::NoSolution(derivation) => {
+                        let explanation = DefaultStringReporter::report(&derivation);
+                        ResolutionError::new_err(format!("No solution found.\n\n{}", explanation))
                     }
+                    e => PyValueError::new_err(format!("Resolution error: {}", e)),
+                })
+        })?;
+
+        let mut result = HashMap::new();
+        for (pkg, ver) in solution {
+            let pkg_name = pkg.0.to_string();
+            if pkg_name != "__root__" {
+                result.insert(pkg_name, ver.to_string());
+            }
+        }
+        // Only memoize if no ingest raced the search: an add_package that
+        // cleared the memo mid-solve would otherwise be shadowed by this
+        // insert, reviving an answer that predates the new versions.
+        let mut cache = self.solution_cache.lock().unwrap();
+        if self.store.read().unwrap().generation() == generation {
+            cache.insert(cache_key, result.clone());
+        }
+        drop(cache);
+        self.build_result(py, &result)
+    }
+}
+
+impl Resolver {
+    /// Build the Python result dict from a solution, reusing interned key
+    /// objects so repeated resolves do not re-create one PyString per
+    /// package name. Keys are inserted in sorted order, which also makes
+    /// the returned dict's ordering deterministic.
+    fn build_result(&self, py: Python<'_>, solution: &Solution) -> PyResult<Py<PyDict>> {
+        let dict = PyDict::new(py);
+        let mut pairs: Vec<(&String, &String)> = solution.iter().collect();
+        pairs.sort();
+        let mut py_names = self.py_names.lock().unwrap();
+        for (name, version) in pairs {
+            // Probe before inserting: entry() would clone the key String
+            // even when it is already present, which is every call after
+            // the first for a given solution.
+            if !py_names.contains_key(name) {
+                py_names.insert(name.clone(), PyString::intern(py, name).unbind());
+            }
+            dict.set_item(py_names[name].bind(py), version)?;
+        }
+        Ok(dict.unbind())
+    }
+
+    /// Parallel variant of add_packages: snapshot the nested dicts into
+    /// owned Rust data, release the GIL, and parse each package's versions
+    /// and constraints on the rayon pool before merging into the store.
+    ///
+    /// Parsing off-GIL cannot touch the shared constraint cache, so this
+    /// path trades cache hits for parallelism — a win once the index is
+    /// large enough to amortize the snapshot copies.
+    fn add_packages_parallel(&self, available: &Bound<'_, PyDict>) -> PyResult<()> {
+        type Snapshot = Vec<(String, Vec<(String, Vec<(String, String)>)>)>;
+        type Parsed = Vec<(String, Vec<(Version, Vec<(String, Ranges<Version>)>)>)>;
+
+        let mut snapshot: Snapshot = Vec::with_capacity(available.len());
+        for (pkg, versions) in available.iter() {
+            let name = pkg.downcast::<PyString>()?.to_str()?.to_owned();
+            let versions = versions.downcast::<PyDict>()?;
+            let mut entries = Vec::with_capacity(versions.len());
+            for (ver, deps) in versions.iter() {
+                let ver = ver.downcast::<PyString>()?.to_str()?.to_owned();
+                let deps = deps.downcast::<PyDict>()?;
+                let mut pairs = Vec::with_capacity(deps.len());
+                for (dep_name, constraint) in deps.iter() {
+                    pairs.push((
+                        dep_name.downcast::<PyString>()?.to_str()?.to_owned(),
+                        constraint.downcast::<PyString>()?.to_str()?.to_owned(),
+                    ));
                 }
-                Ok(result)
+                entries.push((ver, pairs));
             }
-            Err(PubGrubError::NoSolution(derivation)) => {
-                let explanation = DefaultStringReporter::report(&derivation);
-                Err(ResolutionError::new_err(format!(
-                    "No solution found.\n\n{}",
-                    explanation
-                )))
+            snapshot.push((name, entries));
+        }
+
+        let parsed: Result<Parsed, ResolverError> = available.py().allow_threads(|| {
+            snapshot
+                .into_par_iter()
+                .map(|(name, entries)| {
+                    let mut versions = Vec::with_capacity(entries.len());
+                    for (ver, pairs) in entries {
+                        let version = parse_version(&ver)?;
+                        let mut deps = Vec::with_capacity(pairs.len());
+                        for (dep_name, constraint) in pairs {
+                            deps.push((dep_name, parse_constraint(&constraint)?));
+                        }
+                        versions.push((version, deps));
+                    }
+                    Ok((name, versions))
+                })
+                .collect()
+        });
+
+        self.solution_cache.lock().unwrap().clear();
+        let mut store = self.store.write().unwrap();
+        for (name, versions) in parsed.map_err(|e| PyValueError::new_err(e.to_string()))? {
+            let pkg = self.intern(&name);
+            for (version, deps) in versions {
+                let edges: Vec<(Package, Ranges<Version>)> = deps
+                    .into_iter()
+                    .map(|(dep_name, range)| (self.intern(&dep_name), range))
+                    .collect();
+                store.add(pkg.clone(), version, edges);
             }
-            Err(e) => Err(PyValueError::new_err(format!("Resolution error: {}", e))),
         }
+        Ok(())
+    }
+
+    /// Parse a {dep: constraint} dict into interned dependency edges,
+    /// borrowing every string out of its Python object.
+    fn parse_deps(&self, deps: &Bound<'_, PyDict>) -> PyResult<Vec<(Package, Ranges<Version>)>> {
+        let mut parsed = Vec::with_capacity(deps.len());
+        for (dep_name, constraint) in deps.iter() {
+            let range = self.cached_constraint(constraint.downcast::<PyString>()?.to_str()?)?;
+            let dep = self.intern(dep_name.downcast::<PyString>()?.to_str()?);
+            parsed.push((dep, range));
+        }
+        Ok(parsed)
+    }
+
+    /// Return the shared `Package` for a name, interning it on first sight.
+    fn intern(&self, name: &str) -> Package {
+        let mut interner = self.interner.lock().unwrap();
+        if let Some(pkg) = interner.get(name) {
+            return pkg.clone();
+        }
+        let pkg = Package::from(name);
+        interner.insert(pkg.clone());
+        pkg
+    }
+
+    /// Look up a parsed constraint, parsing and caching it on first sight.
+    fn cached_constraint(&self, constraint: &str) -> PyResult<Ranges<Version>> {
+        let mut cache = self.constraint_cache.lock().unwrap();
+        if let Some(range) = cache.get(constraint) {
+            return Ok(range.clone());
+        }
+        let range =
+            parse_constraint(constraint).map_err(|e| PyValueError::new_err(e.to_string()))?;
+        cache.insert(constraint.to_string(), range.clone());
+        Ok(range)
     }
 }
 
 impl Default for Resolver {
     fn default() -> Self {
-        Self::new()
+        Self::new(None)
     }
 }
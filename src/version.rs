@@ -0,0 +1,165 @@
+//! Version type with a packed integer key for fast comparison.
+
+use std::cmp::Ordering;
+use std::fmt::{self, Display};
+use std::hash::{Hash, Hasher};
+use std::ops::Deref;
+
+/// A semver version carrying a precomputed 128-bit comparison key.
+///
+/// Version comparison sits on the hot path of both selection and constraint
+/// matching. For plain releases — no pre-release or build metadata, numeric
+/// fields fitting in 32 bits — the key packs `major | minor | patch` into
+/// consecutive 32-bit lanes, so ordering is a single integer comparison
+/// instead of field-by-field branching. Anything else sets `exotic` and
+/// falls back to semver's full comparison.
+#[derive(Debug, Clone)]
+pub struct Version {
+    inner: semver::Version,
+    packed: u128,
+    exotic: bool,
+}
+
+impl Version {
+    /// Create a plain `major.minor.patch` release version.
+    pub fn new(major: u64, minor: u64, patch: u64) -> Self {
+        Self::from(semver::Version::new(major, minor, patch))
+    }
+
+    /// Parse a semver version string.
+    pub fn parse(text: &str) -> Result<Self, semver::Error> {
+        semver::Version::parse(text).map(Self::from)
+    }
+
+    /// The packed comparison key. Only meaningful when `!is_exotic()`.
+    pub(crate) fn packed(&self) -> u128 {
+        self.packed
+    }
+
+    /// Whether ordering falls back to semver's field-by-field comparison.
+    pub(crate) fn is_exotic(&self) -> bool {
+        self.exotic
+    }
+}
+
+impl From<semver::Version> for Version {
+    fn from(inner: semver::Version) -> Self {
+        let fits = inner.major <= u64::from(u32::MAX)
+            && inner.minor <= u64::from(u32::MAX)
+            && inner.patch <= u64::from(u32::MAX);
+        // semver's Ord also consults pre-release and build segments, which
+        // the packed lanes cannot represent.
+        let exotic = !fits || !inner.pre.is_empty() || !inner.build.is_empty();
+        let packed = if exotic {
+            0
+        } else {
+            (u128::from(inner.major) << 64)
+                | (u128::from(inner.minor) << 32)
+                | u128::from(inner.patch)
+        };
+        Version {
+            inner,
+            packed,
+            exotic,
+        }
+    }
+}
+
+impl Deref for Version {
+    type Target = semver::Version;
+
+    fn deref(&self) -> &semver::Version {
+        &self.inner
+    }
+}
+
+impl PartialEq for Version {
+    fn eq(&self, other: &Self) -> bool {
+        if !self.exotic && !other.exotic {
+            self.packed == other.packed
+        } else {
+            self.inner == other.inner
+        }
+    }
+}
+
+impl Eq for Version {}
+
+impl Hash for Version {
+    fn hash<H: Hasher>(&self, state: &mut H) {
+        // Equal versions always agree on `exotic`, so hashing the packed
+        // key for plain releases stays consistent with Eq while feeding the
+        // hasher one u128 instead of every field.
+        if self.exotic {
+            self.inner.hash(state);
+        } else {
+            self.packed.hash(state);
+        }
+    }
+}
+
+impl PartialOrd for Version {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> {
+        Some(self.cmp(other))
+    }
+}
+
+impl Ord for Version {
+    fn cmp(&self, other: &Self) -> Ordering {
+        if !self.exotic && !other.exotic {
+            self.packed.cmp(&other.packed)
+        } else {
+            self.inner.cmp(&other.inner)
+        }
+    }
+}
+
+impl Display for Version {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        self.inner.fmt(f)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn version(s: &str) -> Version {
+        Version::parse(s).unwrap()
+    }
+
+    #[test]
+    fn test_packed_ordering_matches_semver() {
+        let inputs = [
+            "0.0.1", "0.1.0", "1.0.0", "1.0.1", "1.2.3", "2.0.0", "10.0.0",
+        ];
+        for a in inputs {
+            for b in inputs {
+                assert_eq!(
+                    version(a).cmp(&version(b)),
+                    semver::Version::parse(a)
+                        .unwrap()
+                        .cmp(&semver::Version::parse(b).unwrap()),
+                    "{a} vs {b}"
+                );
+            }
+        }
+    }
+
+    #[test]
+    fn test_exotic_versions_fall_back() {
+        assert!(version("1.0.0-alpha").exotic);
+        assert!(version("1.0.0+build").exotic);
+        assert!(!version("1.0.0").exotic);
+        // Pre-releases still sort before their release.
+        assert!(version("1.0.0-alpha") < version("1.0.0"));
+        assert!(version("1.0.0-alpha") < version("1.0.0-beta"));
+    }
+
+    #[test]
+    fn test_equality_is_consistent() {
+        assert_eq!(version("1.2.3"), version("1.2.3"));
+        assert_ne!(version("1.2.3"), version("1.2.4"));
+        assert_ne!(version("1.0.0"), version("1.0.0-alpha"));
+    }
+}
@@ -1,5 +1,7 @@
 """Tests for the pubgrub-py resolver."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from pubgrub_py import ResolutionError, Resolver, resolve
 
@@ -145,6 +147,37 @@ class TestResolverClass:
         assert result["app"] == "1.0.0"
         assert result["lib"] == "1.1.0"
 
+    def test_add_packages_bulk(self) -> None:
+        """Test adding many packages in a single call."""
+        resolver = Resolver()
+        resolver.add_packages(
+            {
+                "app": {"1.0.0": {"lib": ">=1.0.0"}},
+                "lib": {"1.0.0": {}, "1.1.0": {}},
+            }
+        )
+
+        result = resolver.resolve({"app": ">=1.0.0"})
+        assert result["app"] == "1.0.0"
+        assert result["lib"] == "1.1.0"
+
+    def test_add_packages_large_index(self) -> None:
+        """Test bulk add on an index large enough for the parallel path."""
+        available: dict[str, dict[str, dict[str, str]]] = {
+            f"pkg{i}": {"1.0.0": {}, "2.0.0": {}} for i in range(100)
+        }
+        available["app"] = {"1.0.0": {f"pkg{i}": ">=1.0.0" for i in range(100)}}
+
+        result = resolve(requirements={"app": ">=1.0.0"}, available=available)
+        assert result["app"] == "1.0.0"
+        assert result["pkg50"] == "2.0.0"
+
+    def test_add_packages_invalid_version(self) -> None:
+        """Test error on invalid version in bulk add."""
+        resolver = Resolver()
+        with pytest.raises(ValueError, match="Invalid version"):
+            resolver.add_packages({"pkg": {"not-a-version": {}}})
+
     def test_add_package_without_dependencies(self) -> None:
         """Test adding package with no dependencies."""
         resolver = Resolver()
@@ -153,6 +186,85 @@ class TestResolverClass:
         result = resolver.resolve({"standalone": ">=1.0.0"})
         assert result["standalone"] == "1.0.0"
 
+    def test_capacity_hint(self) -> None:
+        """Test that a capacity hint does not change behavior."""
+        resolver = Resolver(capacity_hint=100)
+        resolver.add_package("pkg", "1.0.0")
+
+        result = resolver.resolve({"pkg": ">=1.0.0"})
+        assert result["pkg"] == "1.0.0"
+
+    def test_resolve_twice_with_different_requirements(self) -> None:
+        """Test that one resolver can serve several resolve calls."""
+        resolver = Resolver()
+        resolver.add_package("pkg", "1.0.0")
+        resolver.add_package("pkg", "2.0.0")
+
+        assert resolver.resolve({"pkg": "<2.0.0"})["pkg"] == "1.0.0"
+        assert resolver.resolve({"pkg": ">=2.0.0"})["pkg"] == "2.0.0"
+
+    def test_repeated_resolve_sees_new_packages(self) -> None:
+        """Test that repeated resolves pick up packages added in between."""
+        resolver = Resolver()
+        resolver.add_package("pkg", "1.0.0")
+        assert resolver.resolve({"pkg": ">=1.0.0"})["pkg"] == "1.0.0"
+
+        resolver.add_package("pkg", "2.0.0")
+        assert resolver.resolve({"pkg": ">=1.0.0"})["pkg"] == "2.0.0"
+
+    def test_failed_bulk_add_is_atomic(self) -> None:
+        """Test that a failing bulk add leaves the resolver unchanged."""
+        resolver = Resolver()
+        resolver.add_package("pkg", "1.0.0")
+        assert resolver.resolve({"pkg": ">=1.0.0"})["pkg"] == "1.0.0"
+
+        # The whole batch is rejected: nothing before the bad version lands.
+        with pytest.raises(ValueError, match="Invalid version"):
+            resolver.add_packages({"pkg": {"2.0.0": {}, "bad version": {}}})
+
+        with pytest.raises(ResolutionError):
+            resolver.resolve({"pkg": ">=2.0.0"})
+        assert resolver.resolve({"pkg": ">=1.0.0"})["pkg"] == "1.0.0"
+
+    def test_concurrent_resolves(self) -> None:
+        """Test that independent resolvers can resolve from a thread pool."""
+
+        def run(_: int) -> dict[str, str]:
+            resolver = Resolver()
+            resolver.add_package("app", "1.0.0", {"lib": ">=1.0.0"})
+            resolver.add_package("lib", "1.0.0", {})
+            resolver.add_package("lib", "1.1.0", {})
+            return resolver.resolve({"app": ">=1.0.0"})
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(run, range(8)))
+
+        for result in results:
+            assert result == {"app": "1.0.0", "lib": "1.1.0"}
+
+    def test_concurrent_resolves_shared_resolver(self) -> None:
+        """Test that threads can share one resolver without borrow errors."""
+        resolver = Resolver()
+        resolver.add_package("app", "1.0.0", {"lib": ">=1.0.0"})
+        resolver.add_package("lib", "1.0.0", {})
+        resolver.add_package("lib", "1.1.0", {})
+
+        def run(i: int) -> dict[str, str]:
+            # Alternate requirements so half the calls miss the solution memo
+            # and actually run the search concurrently.
+            if i % 2:
+                return resolver.resolve({"app": ">=1.0.0"})
+            return resolver.resolve({"lib": ">=1.0.0"})
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(run, range(16)))
+
+        for i, result in enumerate(results):
+            if i % 2:
+                assert result == {"app": "1.0.0", "lib": "1.1.0"}
+            else:
+                assert result == {"lib": "1.1.0"}
+
     def test_invalid_version_format(self) -> None:
         """Test error on invalid version format."""
         resolver = Resolver()